@@ -9,6 +9,10 @@ import cv2
 import time
 import requests
 import threading
+import collections
+import logging
+import importlib
+import re
 from urllib.parse import urlparse
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QLineEdit, QTextEdit, QGroupBox, 
@@ -16,8 +20,49 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QFrame, QSlider, QSpinBox, QComboBox, QTabWidget,
                              QSplitter, QScrollArea)
 from PyQt5.QtGui import QImage, QPixmap, QFont, QDragEnterEvent, QDropEvent
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from detector import CarCounter
+from PyQt5.QtCore import (QThread, pyqtSignal, pyqtSlot, Qt, QEvent, QSize,
+                          QMetaObject, Q_ARG, QTimer)
+import numpy as np
+
+# Vehicle counts as shown in the UI (detector keys: mobil / bandung / jakarta)
+Counts = collections.namedtuple('Counts', 'total up down')
+
+# Extensions accepted by the drop area and the file picker
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'})
+
+def bgr_to_qimage(frame, qt_image=None):
+    """
+    Convert a BGR frame into a QImage in the raster engine's native
+    Format_RGB32 (B,G,R,0xFF in memory), so QPixmap.fromImage on the GUI
+    thread shares the pixels instead of converting them.
+    OpenCV writes straight into the QImage's own buffer. Pass an existing
+    QImage of the same size to reuse its memory: bits() detaches first if
+    the image is still shared with the GUI, so reuse never tears a frame.
+    """
+    h, w = frame.shape[:2]
+    if qt_image is None:
+        qt_image = QImage(w, h, QImage.Format_RGB32)
+    ptr = qt_image.bits()
+    # sizeInBytes() only exists from Qt 5.10; this is the same value on any Qt 5
+    ptr.setsize(h * qt_image.bytesPerLine())
+    # 32-bit pixels keep every scanline 4-byte aligned, so Qt stays on its
+    # SIMD blit path; honour bytesPerLine() anyway rather than assume w * 4
+    view = np.frombuffer(ptr, np.uint8).reshape(h, qt_image.bytesPerLine() // 4, 4)[:, :w]
+    cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=view)
+    return qt_image
+
+class QtLogHandler(logging.Handler):
+    """logging handler that appends records to a QTextEdit from any thread"""
+    
+    def __init__(self, text_edit):
+        super().__init__()
+        self.text_edit = text_edit
+        self.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', '%H:%M:%S'))
+    
+    def emit(self, record):
+        # Queued invoke: safe from worker threads, runs append on the GUI thread
+        QMetaObject.invokeMethod(self.text_edit, "append", Qt.QueuedConnection,
+                                 Q_ARG(str, self.format(record)))
 
 class SimpleDropArea(QFrame):
     """Area sederhana untuk drag & drop video"""
@@ -64,28 +109,135 @@ class SimpleDropArea(QFrame):
         if event.button() == Qt.LeftButton:
             file_path, _ = QFileDialog.getOpenFileName(
                 self, "Select Video File", "", 
-                "Video Files (*.mp4 *.avi *.mov *.mkv);;All Files (*)"
+                "Video Files (%s);;All Files (*)" % " ".join("*" + ext for ext in sorted(VIDEO_EXTENSIONS))
             )
             if file_path:
                 self.file_dropped.emit(file_path)
                 self.label.setText(f"Selected: {os.path.basename(file_path)}")
     
     def _is_video_file(self, file_path):
-        return file_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.wmv'))
+        return os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS
     
     def reset(self):
         self.label.setText("Drop video file here or click to browse")
 
+class FrameBuffer:
+    """Bounded frame buffer between the decoder thread and the inference loop"""
+    
+    def __init__(self, maxlen=2, drop_stale=True):
+        # drop_stale=True: live source, consumer always gets the newest frame
+        # drop_stale=False: file source, producer blocks so no frame is lost
+        self._frames = collections.deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.drop_stale = drop_stale
+        self.closed = False
+    
+    def put(self, frame):
+        """Push a frame, returns False once the buffer has been closed"""
+        with self._cond:
+            if not self.drop_stale:
+                self._cond.wait_for(
+                    lambda: self.closed or len(self._frames) < self._frames.maxlen)
+            if self.closed:
+                return False
+            self._frames.append(frame)  # deque(maxlen) drops the oldest frame
+            self._cond.notify_all()
+            return True
+    
+    def get(self, timeout=None):
+        """Pop the next frame, or None on timeout / when closed and drained"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frames or self.closed, timeout)
+            if not self._frames:
+                return None
+            if self.drop_stale:
+                frame = self._frames.pop()
+                self._frames.clear()
+            else:
+                frame = self._frames.popleft()
+            self._cond.notify_all()
+            return frame
+    
+    def exhausted(self):
+        """True when the producer is done and every frame has been consumed"""
+        with self._cond:
+            return self.closed and not self._frames
+    
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+_GSTREAMER_AVAILABLE = None  # Lazily filled by _opencv_has_gstreamer()
+
+def _opencv_has_gstreamer():
+    """Whether this OpenCV build includes the GStreamer backend (checked once)"""
+    global _GSTREAMER_AVAILABLE
+    if _GSTREAMER_AVAILABLE is None:
+        _GSTREAMER_AVAILABLE = re.search(r'GStreamer:\s+YES', cv2.getBuildInformation()) is not None
+    return _GSTREAMER_AVAILABLE
+
+class PyAVCapture:
+    """cv2.VideoCapture-compatible reader for network streams using PyAV"""
+    
+    def __init__(self, url):
+        import av  # Optional dependency, only needed for stream URLs
+        self._av = av
+        # TCP avoids RTP packet loss smearing frames; nobuffer cuts startup latency
+        options = {'rtsp_transport': 'tcp', 'fflags': 'nobuffer'}
+        try:
+            from av.codec.hwaccel import HWAccel  # PyAV >= 14
+            self._container = av.open(url, container_options=options, hwaccel=HWAccel(
+                device_type='cuda', allow_software_fallback=True))
+        except Exception:
+            # Old PyAV or no usable GPU decoder: FFmpeg software decode
+            self._container = av.open(url, container_options=options)
+        self._stream = self._container.streams.video[0]
+        self._stream.thread_type = 'AUTO'  # Frame + slice threaded decoding
+        self._frames = self._container.decode(self._stream)
+        self._frame = None
+    
+    def isOpened(self):
+        return self._container is not None
+    
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self._stream.average_rate or 0)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self._stream.frames)  # 0 for live streams
+        return 0.0
+    
+    def grab(self):
+        try:
+            self._frame = next(self._frames)
+            return True
+        except (StopIteration, self._av.FFmpegError):
+            return False
+    
+    def retrieve(self):
+        return True, self._frame.to_ndarray(format='bgr24')
+    
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+    
+    def release(self):
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+
 class VideoProcessor(QThread):
     """Thread untuk memproses video"""
-    frame_ready = pyqtSignal(QImage)
-    count_updated = pyqtSignal(dict)
     progress_updated = pyqtSignal(int)
     error_occurred = pyqtSignal(str)
+    status_changed = pyqtSignal(str)
     finished_processing = pyqtSignal()
     
     def __init__(self, video_path, model_path, line_position=70, confidence=0.25, 
-                 iou=0.45, detection_zone=50, frame_skip=1, device="auto"):
+                 iou=0.45, detection_zone=50, frame_skip=1, device="auto",
+                 realtime=False, batch_size=1, display_every=0, car_counter=None,
+                 motion_gate=False, precision="fp32", max_width=0, backend="torch"):
         super().__init__()
         self.video_path = video_path
         self.model_path = model_path
@@ -93,94 +245,501 @@ class VideoProcessor(QThread):
         self.confidence = confidence
         self.iou = iou
         self.detection_zone = detection_zone
-        self.frame_skip = frame_skip
+        self.frame_skip = max(1, frame_skip)  # Decode stride, 1 = every frame
         self.device = device
-        self.running = True
+        self.precision = precision  # "fp32", "fp16" or "int8"
+        self.backend = backend  # "torch", "tensorrt", "onnx" or "openvino"
+        self.max_width = max_width  # Downscale wider frames right after decode, 0 = off
+        self.realtime = realtime  # Pace output to source FPS (preview mode)
+        self.batch_size = max(1, batch_size)  # Frames per YOLO forward pass
+        self.display_every = display_every  # Preview every N frames, 0 = auto (~15 fps)
+        self.motion_gate = motion_gate  # Skip inference while the counting band is static
+        self._stop_event = threading.Event()  # Set by stop(), checked by every stage
+        self._reset_requested = threading.Event()  # Set by reset_counter(), applied by the worker
         self.paused = False
-        self.car_counter = None
+        self.car_counter = car_counter  # Reused detector from a previous run, if any
+        self.frame_buffer = None
+        self.display_buffer = None  # Latest annotated frame awaiting preview conversion
+        self.total_frames = 0
+        self.processed_frames = 0
+        self._last_progress = -1
+        self.latest_counts = None  # Polled by the GUI timer (latest wins)
+        self.latest_image = None  # (sequence, QImage) polled by the GUI preview timer
+        self._live_source = False
+        self._frame_interval = 1.0 / 30
+        self._process_time = 0.0  # Rolling average inference time per frame (s)
+        self.fps = 0.0  # Smoothed frames handled per second, polled by the GUI
+        self._fps_last = None  # perf_counter() of the last FPS update
+        self._pace_start = None  # Realtime playback clock origin (perf_counter)
+        self._paced_frames = 0  # Source frames played since _pace_start
+        self._gate_gray = None  # Counting band of the last inferred frame (grayscale)
+        self._gate_idle = 0  # Consecutive frames skipped by the motion gate
+        self.emit_frames = True  # False while the window is minimized/hidden
+        self.display_size = QSize()  # Preview label size, invalid = full resolution
+        self._preview_images = []  # Reusable preview QImages (allocated once per size)
+        self._preview_index = 0
+        self._resize_buffer = None  # Reused cv2.resize output for previews
+    
+    def _resolve_device(self):
+        """Map "auto" to the first CUDA GPU when one is usable, else the CPU"""
+        if self.device != "auto":
+            return self.device
+        try:
+            import torch  # Already loaded by ultralytics, so this is free
+            return 0 if torch.cuda.is_available() else 'cpu'
+        except ImportError:
+            return 'cpu'
+    
+    def _is_live_source(self):
+        """Webcam index or stream URL (anything that is not a local file)"""
+        return not (isinstance(self.video_path, str) and os.path.isfile(self.video_path))
+    
+    def _open_capture(self):
+        """Open the source, preferring FFmpeg with hardware decoding for files/URLs"""
+        if not isinstance(self.video_path, str):
+            # Webcam index: FFmpeg can't open those, use the platform backend.
+            # Keep the driver queue short so frames aren't served late
+            cap = cv2.VideoCapture(self.video_path)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            return cap
+        
+        if urlparse(self.video_path).scheme in ('rtsp', 'rtmp', 'http', 'https'):
+            try:
+                return PyAVCapture(self.video_path)
+            except ImportError:
+                pass  # PyAV not installed: OpenCV's FFmpeg backend below
+            except Exception as e:
+                logging.getLogger("vehicle_counter").warning("PyAV open failed, using OpenCV: %s", e)
+            cap = self._open_gstreamer()
+            if cap is not None:
+                return cap
+            # Same low-latency demuxer settings as PyAVCapture; read by OpenCV's
+            # FFmpeg backend at open time, an explicit user setting wins
+            os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', 'rtsp_transport;tcp|fflags;nobuffer')
+        
+        # Force FFmpeg rather than whatever the platform default is (GStreamer,
+        # MSMF); HW acceleration must be requested at open time and FFmpeg
+        # silently falls back to software when no NVDEC/VAAPI/D3D11 is present
+        if hasattr(cv2, 'VIDEO_ACCELERATION_ANY'):
+            params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            cap = cv2.VideoCapture(self.video_path, cv2.CAP_FFMPEG, params)
+        else:
+            # OpenCV < 4.5.2 has neither the constants nor the params overload
+            cap = cv2.VideoCapture(self.video_path, cv2.CAP_FFMPEG)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        # OpenCV build without FFmpeg: default backend
+        return cv2.VideoCapture(self.video_path)
+    
+    def _open_gstreamer(self):
+        """RTSP through a GStreamer pipeline when OpenCV was built with it, else None"""
+        if not self.video_path.startswith('rtsp://') or not _opencv_has_gstreamer():
+            return None
+        # decodebin picks the highest-ranked decoder, i.e. nvh264dec/nvh265dec,
+        # vaapi or d3d11 when present; appsink keeps only the newest frame
+        pipeline = (f'rtspsrc location="{self.video_path}" latency=0 protocols=tcp ! '
+                    'decodebin ! videoconvert ! video/x-raw,format=BGR ! '
+                    'appsink drop=true max-buffers=1 sync=false')
+        cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        return None
+    
+    def _frames_to_skip(self):
+        """Number of frames to grab() without decoding before the next read()"""
+        if self.frame_skip > 1:
+            return self.frame_skip - 1  # Fixed stride: process every N-th frame
+        if self._live_source and self._process_time > 0:
+            # Behind realtime: skip what inference cannot keep up with anyway
+            return max(0, round(self._process_time / self._frame_interval) - 1)
+        return 0
+    
+    def _downscale(self, frame):
+        """Shrink frames wider than max_width so every later stage works on fewer pixels"""
+        h, w = frame.shape[:2]
+        if self.max_width <= 0 or w <= self.max_width:
+            return frame
+        return cv2.resize(frame, (self.max_width, round(h * self.max_width / w)),
+                          interpolation=cv2.INTER_AREA)
+    
+    def _grab_newest(self, cap, max_grabs=30):
+        """Live sources: grab() through frames the backend has already buffered.
+        
+        A buffered frame comes back from grab() quickly, while a fresh one has
+        to wait for the network, so keep grabbing until a grab blocks. This
+        catches up on backends that ignore CAP_PROP_BUFFERSIZE (FFmpeg/RTSP).
+        """
+        for _ in range(max_grabs):
+            start = time.perf_counter()
+            if not cap.grab():
+                return False
+            if time.perf_counter() - start > self._frame_interval / 2:
+                break  # Waited on the source: this is the newest frame
+        return True
+    
+    def _decode_loop(self, cap):
+        """Decoder thread: keep the frame buffer filled while inference runs"""
+        # Bound methods hoisted out of the loop, which runs once per source frame
+        stopped = self._stop_event.is_set
+        grab, read, retrieve = cap.grab, cap.read, cap.retrieve
+        put, downscale = self.frame_buffer.put, self._downscale
+        frames_to_skip = self._frames_to_skip
+        live = self._live_source
+        try:
+            while not stopped():
+                # grab() only advances the stream; skipped frames never pay for
+                # the colour conversion and copy done by retrieve()
+                for _ in range(frames_to_skip()):
+                    if not grab():
+                        return
+                if live:
+                    if not self._grab_newest(cap):
+                        break
+                    ret, frame = retrieve()
+                else:
+                    ret, frame = read()
+                if not ret or not put(downscale(frame)):
+                    break
+        finally:
+            self.frame_buffer.close()
     
     def run(self):
+        # Grad mode is per thread: switch autograd off once for the whole worker,
+        # the per-call no_grad inside ultralytics then becomes a cheap no-op
+        import torch  # Usually already loaded by the background import
+        with torch.inference_mode():
+            self._run()
+    
+    def _run(self):
+        cap = decoder = display = None
+        completed = False
         try:
-            # Initialize detector
-            self.car_counter = CarCounter(self.model_path)
+            # Initialize detector (weights load only when no cached instance was given)
+            cold_start = self.car_counter is None
+            device = self._resolve_device()
+            if cold_start:
+                if self.backend == "tensorrt":
+                    self.status_changed.emit("Building TensorRT engine (first run only)...")
+                elif self.backend in ("onnx", "openvino"):
+                    self.status_changed.emit("Exporting model (first run only)...")
+                elif self.precision == "int8":
+                    self.status_changed.emit("Quantizing model (first run only)...")
+                # Deferred import: torch/ultralytics would otherwise delay the window
+                from detector import CarCounter
+                self.car_counter = CarCounter(self.model_path, device=device,
+                                              precision=self.precision,
+                                              backend=self.backend,
+                                              batch_size=self.batch_size)
+            else:
+                self.car_counter.reset_counter()
+                self.car_counter.device = device
             
             # Open video
-            cap = cv2.VideoCapture(self.video_path)
+            cap = self._open_capture()
             if not cap.isOpened():
                 self.error_occurred.emit(f"Cannot open video: {self.video_path}")
                 return
             
             # Get video properties
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            self._frame_interval = 1.0 / fps
+            self._live_source = self._is_live_source()
+            self._process_time = 0.0
             
             # Read first frame to get dimensions
             ret, first_frame = cap.read()
             if not ret:
                 self.error_occurred.emit("Cannot read first frame from video")
                 return
+            first_frame = self._downscale(first_frame)
             
             # Set counting line position based on frame dimensions
             self.car_counter.set_counting_line(first_frame.shape[0], self.line_position / 100.0)
             
             # Set detection zone
             self.car_counter.set_detection_zone(self.detection_zone)
+            # Skipped frames are only grab()bed; widen the zone to match the stride
+            self.car_counter.set_sample_every(self.frame_skip)
             
             # Set debug mode
             self.car_counter.set_debug(False)  # Disable debug for performance
             
-            # Reset video to beginning
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # A freshly loaded model pays its backend init on the first forward
+            # pass; take that hit here instead of stalling the first real frame
+            if cold_start:
+                self.status_changed.emit("Warming up...")
+                try:
+                    self.car_counter.warmup(
+                        first_frame.shape, batch_size=self.batch_size,
+                        confidence=self.confidence, iou=self.iou
+                    )
+                except Exception as e:
+                    logging.getLogger("vehicle_counter").warning("Model warm-up failed: %s", e)
+                if not self.paused:
+                    self.status_changed.emit("Processing...")
+            
+            # Start decoder thread; the first frame is reused instead of seeking back.
+            # Files get room for two batches so decoding keeps running while a
+            # whole batch is being inferred. Live sources keep a single slot that
+            # the decoder overwrites, so latency stays at one frame however slow
+            # inference is; a dropped frame only makes the last_y -> current_y
+            # step larger, which the crossing test handles
+            depth = 1 if self._live_source else max(4, 2 * self.batch_size)
+            self.frame_buffer = FrameBuffer(maxlen=depth, drop_stale=self._live_source)
+            self.frame_buffer.put(first_frame)
+            decoder = threading.Thread(target=self._decode_loop, args=(cap,), daemon=True)
+            decoder.start()
             
-            frame_count = 0
+            # Display thread converts previews so inference never waits on it
+            self.display_buffer = FrameBuffer(maxlen=1, drop_stale=True)
+            display = threading.Thread(target=self._display_loop, daemon=True)
+            display.start()
             
-            while self.running:
-                if not self.paused:
-                    ret, frame = cap.read()
-                    if not ret:
+            self.processed_frames = 0
+            self._last_progress = -1
+            self._gate_gray = None
+            self._gate_idle = 0
+            self.fps = 0.0
+            self._fps_last = time.perf_counter()
+            self._pace_start = None
+            batch = []
+            
+            while not self._stop_event.is_set():
+                # Checked every iteration so a reset shows up while paused or
+                # while the motion gate is skipping frames
+                self._apply_pending_reset()
+                if self.paused:
+                    self._fps_last = None  # Don't average the pause into the FPS
+                    self._pace_start = None  # Restart the playback clock on resume
+                    self._stop_event.wait(0.05)
+                    continue
+                
+                frame = self.frame_buffer.get(timeout=0.1)
+                if frame is None:
+                    if self.frame_buffer.exhausted():
                         break
-                    
-                    # Process frame with custom parameters
-                    processed_frame, counts = self.car_counter.process_frame(
-                        frame, 
-                        tracking=True,  # Always use tracking for now
-                        confidence=self.confidence,
-                        iou=self.iou
-                    )
-                    
-                    # Convert to Qt format
-                    rgb_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = rgb_frame.shape
-                    qt_image = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
-                    
-                    # Emit signals
-                    self.frame_ready.emit(qt_image)
-                    self.count_updated.emit(counts)
-                    
-                    # Update progress
-                    frame_count += 1
-                    progress = int((frame_count / total_frames) * 100) if total_frames > 0 else 0
-                    self.progress_updated.emit(progress)
-                    
-                    # Control playback speed
-                    self.msleep(int(1000 / fps))
+                    continue
+                if self.motion_gate and self._is_idle(frame):
+                    self._advance_progress()  # Counts and preview stay as they are
+                    self._update_fps(1)
+                    self._pace(1)
+                    continue
+                if not batch:
+                    batch_start = time.perf_counter()
+                
+                # Collect frames until the batch is full
+                batch.append(frame)
+                if len(batch) < self.batch_size:
+                    continue
+                
+                self._process_frames(batch)
+                self._update_fps(len(batch))
+                elapsed = time.perf_counter() - batch_start
+                self._process_time = 0.9 * self._process_time + 0.1 * (elapsed / len(batch))
+                self._pace(len(batch))
+                batch = []
             
-            cap.release()
-            self.finished_processing.emit()
+            # Flush a partially filled batch at end of video
+            if batch and not self._stop_event.is_set():
+                self._process_frames(batch)
+            completed = True
             
         except Exception as e:
             self.error_occurred.emit(f"Processing error: {str(e)}")
+        finally:
+            # Every exit path: stop the decoder before releasing the capture it
+            # reads from, and let the display thread convert the last preview
+            for buffer in (self.frame_buffer, self.display_buffer):
+                if buffer:
+                    buffer.close()
+            if decoder:
+                decoder.join()
+            if cap is not None:
+                cap.release()
+            if display:
+                display.join()
+        if completed:
+            self.finished_processing.emit()
+    
+    def _display_loop(self):
+        """Display thread: convert the newest annotated frame and emit it"""
+        while True:
+            frame = self.display_buffer.get()
+            if frame is None:  # Closed and drained
+                break
+            # Publish instead of signalling: the GUI samples the newest image at
+            # its own rate, so bursts never queue up in the event loop. The
+            # published QImage is a shared copy, which keeps its ring slot
+            # non-detached (never rewritten in place) while the GUI may read it
+            seq = self.latest_image[0] + 1 if self.latest_image else 1
+            self.latest_image = (seq, QImage(self._to_preview_image(frame)))
+    
+    def _process_frames(self, frames):
+        """Run inference on the collected frames and publish results in order"""
+        self._apply_pending_reset()
+        
+        # Pick the path by run mode, not by len(frames): process_frame and
+        # process_batch keep separate trackers, so a batched run's 1-frame
+        # remainder must stay on the batch tracker to keep its track IDs
+        if self.batch_size == 1:
+            outputs = [self.car_counter.process_frame(
+                frames[0], 
+                tracking=True,  # Always use tracking for now
+                confidence=self.confidence,
+                iou=self.iou
+            )]
+        else:
+            outputs = self.car_counter.process_batch(
+                frames, tracking=True, confidence=self.confidence, iou=self.iou
+            )
+        
+        for processed_frame, counts in outputs:
+            # Preview is throttled; counts are published for the GUI timer to poll
+            # (a plain attribute assignment is atomic under the GIL)
+            if self._should_display():
+                self.display_buffer.put(processed_frame)
+            self.latest_counts = Counts(counts['mobil'], counts['bandung'], counts['jakarta'])
+            self._advance_progress()
+    
+    def _apply_pending_reset(self):
+        """Apply a reset requested by the GUI and publish the zeroed counts"""
+        if self._reset_requested.is_set():
+            self._reset_requested.clear()
+            self.car_counter.reset_counter()
+            self.latest_counts = Counts(0, 0, 0)
+    
+    def _advance_progress(self):
+        """Count one more frame handled and emit progress when the percentage moves"""
+        self.processed_frames += 1
+        # Each handled frame stands for frame_skip source frames on a file
+        position = self.processed_frames * self.frame_skip
+        progress = min(100, position * 100 // self.total_frames) if self.total_frames > 0 else 0
+        if progress != self._last_progress:  # At most ~100 emits per video
+            self._last_progress = progress
+            self.progress_updated.emit(progress)
     
-    def stop(self):
-        self.running = False
-        self.wait()
+    def _pace(self, frames):
+        """Realtime playback: sleep until the source clock reaches these frames"""
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._pace_start is None:
+            self._pace_start, self._paced_frames = now, 0
+        # Each handled frame stands for frame_skip source frames. Sleeping to an
+        # absolute deadline keeps the pace exact instead of drifting by the
+        # time spent outside inference (queue waits, preview hand-off)
+        self._paced_frames += frames * self.frame_skip
+        slack = self._pace_start + self._paced_frames * self._frame_interval - now
+        if slack > 0:
+            self._stop_event.wait(slack)  # Returns early on stop
+        elif slack < -self._frame_interval:
+            # Inference is slower than the source: don't burst to catch up later
+            self._pace_start = None
+    
+    def _update_fps(self, frames):
+        """Fold the rate since the last update into an exponential moving average"""
+        now = time.perf_counter()
+        if self._fps_last is not None and now > self._fps_last:
+            rate = frames / (now - self._fps_last)
+            self.fps = rate if self.fps == 0 else 0.9 * self.fps + 0.1 * rate
+        self._fps_last = now
+    
+    def _is_idle(self, frame):
+        """Motion gate: True when nothing moved near the counting line"""
+        # Only a band around the line matters for counting; vehicles are picked
+        # up by the tracker as soon as they enter it, well before their centre
+        # reaches the detection zone
+        line = self.car_counter.counting_line_y
+        band = 2 * self.car_counter.detection_zone
+        # Every 4th pixel in both directions is plenty to see a vehicle move and
+        # makes the colour conversion and diff 16x cheaper
+        roi = frame[max(0, line - band):line + band:4, ::4]
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        
+        # Compare against the last inferred frame, not the previous one, so slow
+        # movement accumulates instead of staying under the threshold forever.
+        # Inference still runs every 15 frames to keep tracks alive
+        reference = self._gate_gray
+        if (reference is not None and reference.shape == gray.shape
+                and self._gate_idle < 15):
+            changed = np.count_nonzero(cv2.absdiff(gray, reference) > 25)
+            if changed < gray.size * 0.002:
+                self._gate_idle += 1
+                return True
+        self._gate_gray = gray
+        self._gate_idle = 0
+        return False
+    
+    def _to_preview_image(self, frame):
+        """Convert into one of two preallocated QImages, alternating between them"""
+        h, w = frame.shape[:2]
+        # Shrink to the label here (INTER_AREA, off the GUI thread) so the GUI
+        # only wraps a pixmap of the size it is going to paint
+        target = QSize(w, h).scaled(self.display_size, Qt.KeepAspectRatio)
+        if self.display_size.isValid() and 0 < target.width() < w:
+            w, h = target.width(), target.height()
+            # Consumed right below by bgr_to_qimage, so one scratch array suffices
+            if self._resize_buffer is None or self._resize_buffer.shape[:2] != (h, w):
+                self._resize_buffer = np.empty((h, w, 3), np.uint8)
+            frame = cv2.resize(frame, (w, h), dst=self._resize_buffer,
+                               interpolation=cv2.INTER_AREA)
+        if not self._preview_images or self._preview_images[0].size() != QSize(w, h):
+            self._preview_images = [QImage(w, h, QImage.Format_RGB32) for _ in range(2)]
+        # Alternate so the image the GUI is still showing is normally not the one
+        # being written. QImage is implicitly shared, so the refcount tells us
+        # whether the GUI has released a slot (no extra locking needed)
+        self._preview_index ^= 1
+        qt_image = self._preview_images[self._preview_index]
+        if not qt_image.isDetached():
+            # Still referenced by the GUI: take a fresh buffer rather than let
+            # bits() copy pixels that are about to be overwritten anyway
+            qt_image = QImage(w, h, QImage.Format_RGB32)
+            self._preview_images[self._preview_index] = qt_image
+        return bgr_to_qimage(frame, qt_image)
+    
+    def _should_display(self):
+        """Whether the current frame should be sent to the preview"""
+        if not self.emit_frames:
+            return False
+        every = self.display_every
+        if every <= 0:
+            # Auto: keep the preview around 15 fps whatever the model speed
+            every = max(1, round(self.car_counter.current_fps / 15))
+        return self.processed_frames % every == 0
+    
+    def stop(self, wait=True):
+        """Ask every stage to stop; with wait=False returns immediately and
+        finished_processing is emitted once the current batch is done"""
+        self._stop_event.set()
+        if self.frame_buffer:
+            self.frame_buffer.close()  # Wake a decoder blocked on a full buffer
+        if wait:
+            self.wait()
     
     def pause(self):
         self.paused = not self.paused
     
+    @pyqtSlot(bool)
+    def set_emit_frames(self, enabled):
+        """Enable/disable preview frame conversion and emission"""
+        self.emit_frames = enabled
+    
+    @pyqtSlot(QSize)
+    def set_display_size(self, size):
+        """Size of the preview area; frames are downscaled to fit it"""
+        self.display_size = QSize(size)
+    
     def reset_counter(self):
-        if self.car_counter:
+        # The worker may be inside the detector's track arrays right now, so a
+        # running thread applies the reset itself between batches
+        if self.isRunning():
+            self._reset_requested.set()
+        elif self.car_counter:
             self.car_counter.reset_counter()
+        self.latest_counts = None  # Don't let the GUI redisplay pre-reset counts
 
 class CarCounterApp(QWidget):
     """Main application - Clean and Simple"""
@@ -189,9 +748,31 @@ class CarCounterApp(QWidget):
         super().__init__()
         self.video_thread = None
         self.current_video = None
-        self.frame_count = 0
-        self.start_time = None
+        self._last_counts = None  # Counts currently shown in the labels
+        self._car_counter = None  # Detector kept across runs to skip weight reloads
+        self._loaded_model_key = None  # (path, precision, backend, batch mode) of the cached detector
+        self._model_key = None  # Key of the model the running worker uses
+        self._exiting_threads = set()  # Finished workers whose run() hasn't returned yet
+        self._ui_visible = True
+        self._preview_source_size = QSize()  # Size of the last frame shown
+        self._preview_target_size = QSize()  # Cached aspect-correct display size
         self.setup_ui()
+        
+        # Import torch/ultralytics while the user picks a video, so Start does
+        # not pay for it; the worker's own import just waits on this one
+        threading.Thread(target=importlib.import_module, args=("detector",),
+                         daemon=True).start()
+        
+        # Counters are polled at 10 Hz instead of repainted on every frame
+        self._counter_timer = QTimer(self)
+        self._counter_timer.timeout.connect(self._flush_counters)
+        self._counter_timer.start(100)
+        
+        # Preview samples the worker's newest frame at ~30 Hz while processing
+        self._shown_image_seq = 0
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setInterval(33)
+        self._preview_timer.timeout.connect(self._refresh_preview)
     
     def setup_ui(self):
         """Setup clean UI"""
@@ -378,6 +959,7 @@ class CarCounterApp(QWidget):
         
         # Status indicator
         self.status_indicator = QLabel("●")
+        # Parsed once; state changes only flip the "status" dynamic property
         self.status_indicator.setStyleSheet("""
             QLabel {
                 color: #4CAF50;
@@ -385,7 +967,10 @@ class CarCounterApp(QWidget):
                 border: none;
                 margin: 0px 8px;
             }
+            QLabel[status="busy"] { color: #FF9800; }
+            QLabel[status="paused"] { color: #9E9E9E; }
         """)
+        self.status_indicator.setProperty("status", "ok")
         header_layout.addWidget(self.status_indicator)
         
         return header_container
@@ -460,6 +1045,86 @@ class CarCounterApp(QWidget):
         line_layout.addWidget(self.line_position_label)
         detection_layout.addLayout(line_layout)
         
+        # Realtime pacing (off = process as fast as possible)
+        self.realtime_checkbox = QCheckBox("Realtime playback")
+        self.realtime_checkbox.setToolTip("Limit processing speed to the video's native FPS")
+        detection_layout.addWidget(self.realtime_checkbox)
+        
+        # Processing resolution (YOLO letterboxes to 640 anyway)
+        size_layout = QHBoxLayout()
+        size_layout.addWidget(QLabel("Process width:"))
+        self.max_width_combo = QComboBox()
+        self.max_width_combo.addItems(["Original", "1280", "960", "640"])
+        self.max_width_combo.setToolTip("Downscale wider frames right after decoding")
+        size_layout.addWidget(self.max_width_combo)
+        detection_layout.addLayout(size_layout)
+        
+        # Inference precision (FP16 needs a GPU, INT8 exports a TFLite model once)
+        precision_layout = QHBoxLayout()
+        precision_layout.addWidget(QLabel("Precision:"))
+        self.precision_combo = QComboBox()
+        self.precision_combo.addItems(["FP32", "FP16", "INT8"])
+        self.precision_combo.setToolTip("FP16: half precision on GPU (CPU runs FP32 anyway). "
+                                        "INT8: quantized TFLite model for CPU")
+        # ultralytics ignores half on CPU, so FP16 is a safe default everywhere
+        self.precision_combo.setCurrentText("FP16")
+        precision_layout.addWidget(self.precision_combo)
+        detection_layout.addLayout(precision_layout)
+        
+        # Inference backend (TensorRT engine is built once per precision/batch)
+        backend_layout = QHBoxLayout()
+        backend_layout.addWidget(QLabel("Backend:"))
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("PyTorch", "torch")
+        self.backend_combo.addItem("TensorRT", "tensorrt")
+        self.backend_combo.addItem("ONNX Runtime", "onnx")
+        self.backend_combo.addItem("OpenVINO", "openvino")
+        self.backend_combo.setToolTip("TensorRT needs an NVIDIA GPU and falls back to ONNX Runtime.\n"
+                                      "ONNX Runtime also runs on CPU; OpenVINO targets Intel CPUs.\n"
+                                      "Falls back to PyTorch when the export fails")
+        backend_layout.addWidget(self.backend_combo)
+        detection_layout.addLayout(backend_layout)
+        
+        # Micro-batching (higher throughput, a few frames of extra latency)
+        batch_layout = QHBoxLayout()
+        batch_layout.addWidget(QLabel("Batch size:"))
+        self.batch_size_spin = QSpinBox()
+        self.batch_size_spin.setRange(1, 8)
+        self.batch_size_spin.setValue(1)
+        self.batch_size_spin.setSuffix(" frames")
+        self.batch_size_spin.setToolTip("Frames per YOLO forward pass (2-4 helps on GPU)")
+        batch_layout.addWidget(self.batch_size_spin)
+        detection_layout.addLayout(batch_layout)
+        
+        # Motion gate (fewer YOLO calls on quiet footage)
+        self.motion_gate_checkbox = QCheckBox("Skip idle frames")
+        self.motion_gate_checkbox.setToolTip("Only run detection when something moves near the counting line")
+        detection_layout.addWidget(self.motion_gate_checkbox)
+        
+        # Decode stride (skipped frames are grabbed, never converted)
+        skip_layout = QHBoxLayout()
+        skip_layout.addWidget(QLabel("Analyze every:"))
+        self.frame_skip_spin = QSpinBox()
+        self.frame_skip_spin.setRange(1, 30)
+        self.frame_skip_spin.setValue(1)
+        self.frame_skip_spin.setSpecialValueText("Frame")
+        self.frame_skip_spin.setSuffix(" frames")
+        self.frame_skip_spin.setToolTip("Run detection on every N-th video frame (e.g. 15 = 2 fps on a 30 fps source)")
+        skip_layout.addWidget(self.frame_skip_spin)
+        detection_layout.addLayout(skip_layout)
+        
+        # Preview throttling
+        preview_layout = QHBoxLayout()
+        preview_layout.addWidget(QLabel("Preview every:"))
+        self.display_every_spin = QSpinBox()
+        self.display_every_spin.setRange(0, 30)
+        self.display_every_spin.setValue(0)
+        self.display_every_spin.setSpecialValueText("Auto")
+        self.display_every_spin.setSuffix(" frames")
+        self.display_every_spin.setToolTip("Show every N-th processed frame (Auto = ~15 fps)")
+        preview_layout.addWidget(self.display_every_spin)
+        detection_layout.addLayout(preview_layout)
+        
         layout.addWidget(detection_group)
         
         # Control buttons (simplified)
@@ -497,6 +1162,7 @@ class CarCounterApp(QWidget):
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
+        self.progress_bar.setTextVisible(False)  # No text rendering per update
         layout.addWidget(self.progress_bar)
         
         # Status
@@ -506,8 +1172,14 @@ class CarCounterApp(QWidget):
         
         # Minimal log
         self.log_area = QTextEdit()
+        self.log_area.document().setMaximumBlockCount(500)  # Qt drops oldest lines
         self.log_area.setMaximumHeight(60)
         self.log_area.setPlaceholderText("Logs...")
+        
+        # Messages use lazy %-formatting, skipped entirely when filtered by level
+        self._logger = logging.getLogger("vehicle_counter")
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(QtLogHandler(self.log_area))
         layout.addWidget(self.log_area)
         
         layout.addStretch()
@@ -533,10 +1205,13 @@ class CarCounterApp(QWidget):
         """)
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setText("Video preview will appear here")
+        self.video_label.installEventFilter(self)  # Recompute preview size on resize
         layout.addWidget(self.video_label)
         
         # Counter display (clean row)
         counter_container = QFrame()
+        # One stylesheet for the whole panel: the labels are styled by object
+        # name instead of each carrying (and Qt polishing) its own sheet
         counter_container.setStyleSheet("""
             QFrame {
                 background-color: white;
@@ -544,46 +1219,26 @@ class CarCounterApp(QWidget):
                 border-radius: 8px;
                 padding: 12px;
             }
+            QLabel { border: none; }
+            QLabel#totalCount { font-size: 18px; font-weight: 600; color: #333; }
+            QLabel#upCount { font-size: 14px; color: #4CAF50; }
+            QLabel#downCount { font-size: 14px; color: #FF5722; }
+            QLabel#fpsCount { font-size: 12px; color: #666; }
         """)
         counter_layout = QHBoxLayout(counter_container)
         counter_layout.setSpacing(24)
         
         self.total_label = QLabel("Total: 0")
-        self.total_label.setStyleSheet("""
-            QLabel { 
-                font-size: 18px; 
-                font-weight: 600; 
-                color: #333;
-                border: none;
-            }
-        """)
+        self.total_label.setObjectName("totalCount")
         
         self.up_label = QLabel("Up: 0")
-        self.up_label.setStyleSheet("""
-            QLabel { 
-                font-size: 14px; 
-                color: #4CAF50;
-                border: none;
-            }
-        """)
+        self.up_label.setObjectName("upCount")
         
         self.down_label = QLabel("Down: 0")
-        self.down_label.setStyleSheet("""
-            QLabel { 
-                font-size: 14px; 
-                color: #FF5722;
-                border: none;
-            }
-        """)
+        self.down_label.setObjectName("downCount")
         
         self.fps_label = QLabel("FPS: 0")
-        self.fps_label.setStyleSheet("""
-            QLabel { 
-                font-size: 12px; 
-                color: #666;
-                border: none;
-            }
-        """)
+        self.fps_label.setObjectName("fpsCount")
         
         counter_layout.addWidget(self.total_label)
         counter_layout.addWidget(self.up_label)
@@ -607,18 +1262,18 @@ class CarCounterApp(QWidget):
                 return
             
             self.current_video = file_path
-            self.log(f"Video selected: {os.path.basename(file_path)}")
+            self._logger.info("Video selected: %s", os.path.basename(file_path))
             self.status_label.setText("Video Ready")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error selecting video: {str(e)}")
-            self.log(f"ERROR: {str(e)}")
+            self._logger.error("ERROR: %s", e)
     
     def _is_video_file(self, file_path):
         """Check if file is a valid video file"""
         if not file_path:
             return False
-        return file_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'))
+        return os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS
     
     def on_source_type_changed(self, source_type):
         """Handle source type change"""
@@ -652,6 +1307,11 @@ class CarCounterApp(QWidget):
                 return
             self.current_video = cctv_url
         
+        # Cheap stat on the GUI thread instead of failing after the model load
+        if self.source_type.currentText() == "Local File" and not os.path.isfile(self.current_video):
+            QMessageBox.warning(self, "Warning", f"Video file not found: {self.current_video}")
+            return
+        
         model_path = self.model_input.text().strip()
         if not os.path.exists(model_path):
             QMessageBox.warning(self, "Warning", f"Model file not found: {model_path}")
@@ -660,22 +1320,49 @@ class CarCounterApp(QWidget):
         # Get settings
         line_position = self.line_position_slider.value()
         confidence = self.confidence_slider.value() / 100.0
+        realtime = self.realtime_checkbox.isChecked()
+        batch_size = self.batch_size_spin.value()
+        display_every = self.display_every_spin.value()
+        frame_skip = self.frame_skip_spin.value()
+        motion_gate = self.motion_gate_checkbox.isChecked()
+        precision = self.precision_combo.currentText().lower()
+        max_width_text = self.max_width_combo.currentText()
+        max_width = int(max_width_text) if max_width_text.isdigit() else 0
+        backend = self.backend_combo.currentData()
+        
+        # TensorRT engines are built for a maximum batch size. Other backends
+        # still split on batch mode: track() registers ultralytics' tracker
+        # callbacks on the YOLO instance, so a detector that ran unbatched would
+        # track twice inside process_batch's predict() calls
+        model_key = (model_path, precision, backend,
+                     batch_size if backend == "tensorrt" else batch_size > 1)
+        
+        # Reuse the loaded model unless the path, precision, backend or batch mode changed
+        if model_key != self._loaded_model_key:
+            self._car_counter = None
+        self._model_key = model_key
         
         # Create processing thread
         self.video_thread = VideoProcessor(
-            self.current_video, model_path, line_position, confidence
+            self.current_video, model_path, line_position, confidence,
+            frame_skip=frame_skip, realtime=realtime, batch_size=batch_size,
+            display_every=display_every, car_counter=self._car_counter,
+            motion_gate=motion_gate, precision=precision, max_width=max_width,
+            backend=backend
         )
-        self.video_thread.frame_ready.connect(self.update_video)
-        self.video_thread.count_updated.connect(self.update_counters)
         self.video_thread.progress_updated.connect(self.update_progress)
         self.video_thread.error_occurred.connect(self.show_error)
+        self.video_thread.status_changed.connect(self.status_label.setText)
         self.video_thread.finished_processing.connect(self.on_processing_finished)
+        self.video_thread.finished.connect(self._on_thread_exited)
+        self.video_thread.set_emit_frames(self._ui_visible)
+        self.video_thread.set_display_size(self.video_label.size())
         
-        self.video_thread.start()
-        
-        # Reset counters
-        self.frame_count = 0
-        self.start_time = None
+        # Ahead of the GUI thread when the OS honours it; no core pinning, since
+        # torch's intra-op pool inherits the affinity and would share one core
+        self.video_thread.start(QThread.HighPriority)
+        self._shown_image_seq = 0
+        self._preview_timer.start()
         
         # Update UI
         self.start_btn.setEnabled(False)
@@ -683,9 +1370,16 @@ class CarCounterApp(QWidget):
         self.stop_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
         self.status_label.setText("Processing...")
-        self.status_indicator.setStyleSheet("QLabel { color: #FF9800; font-size: 16px; border: none; }")
+        self._set_status_state("busy")
         
-        self.log(f"Processing started")
+        self._logger.info("Processing started")
+    
+    def _set_status_state(self, state):
+        """Switch the header indicator between "ok", "busy" and "paused" """
+        self.status_indicator.setProperty("status", state)
+        style = self.status_indicator.style()
+        style.unpolish(self.status_indicator)
+        style.polish(self.status_indicator)
     
     def pause_processing(self):
         """Pause/resume processing"""
@@ -694,58 +1388,87 @@ class CarCounterApp(QWidget):
             if self.video_thread.paused:
                 self.pause_btn.setText("Resume")
                 self.status_label.setText("Paused")
-                self.status_indicator.setStyleSheet("QLabel { color: #9E9E9E; font-size: 16px; border: none; }")
+                self._set_status_state("paused")
             else:
                 self.pause_btn.setText("Pause")
                 self.status_label.setText("Processing...")
-                self.status_indicator.setStyleSheet("QLabel { color: #FF9800; font-size: 16px; border: none; }")
+                self._set_status_state("busy")
     
     def stop_processing(self):
-        """Stop processing"""
+        """Stop processing without blocking the GUI on the running inference"""
         if self.video_thread:
-            self.video_thread.stop()
-        self.on_processing_finished()
+            # UI is restored by on_processing_finished when the worker exits
+            self.video_thread.stop(wait=False)
+            self.pause_btn.setEnabled(False)
+            self.stop_btn.setEnabled(False)
+            self.status_label.setText("Stopping...")
+        else:
+            self.on_processing_finished()
     
     def reset_counter(self):
         """Reset vehicle counter"""
         if self.video_thread:
             self.video_thread.reset_counter()
-            self.update_counters({'mobil': 0, 'jakarta': 0, 'bandung': 0})
-            self.log("Counter reset")
+            self.update_counters(Counts(0, 0, 0))
+            self._logger.info("Counter reset")
         else:
-            self.update_counters({'mobil': 0, 'jakarta': 0, 'bandung': 0})
-            self.log("Counter reset")
+            self.update_counters(Counts(0, 0, 0))
+            self._logger.info("Counter reset")
         
-        self.frame_count = 0
-        self.start_time = None
         self.fps_label.setText("FPS: 0")
     
+    def _refresh_preview(self):
+        """Show the worker's newest preview image if it changed since last tick"""
+        latest = self.video_thread.latest_image if self.video_thread else None
+        if latest is None or latest[0] == self._shown_image_seq:
+            return
+        self._shown_image_seq = latest[0]
+        self.update_video(latest[1])
+    
     def update_video(self, qt_image):
         """Update video display"""
+        if not self._ui_visible:
+            return
+        if qt_image.size() != self._preview_source_size:
+            self._preview_source_size = qt_image.size()
+            self._update_preview_target_size()
         pixmap = QPixmap.fromImage(qt_image)
-        scaled_pixmap = pixmap.scaled(self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # Nearest-neighbour scaling: refreshed every frame, smoothing is not visible.
+        # Target size already honours the aspect ratio, so Qt skips that math
+        scaled_pixmap = pixmap.scaled(self._preview_target_size, Qt.IgnoreAspectRatio, Qt.FastTransformation)
         self.video_label.setPixmap(scaled_pixmap)
     
+    def _update_preview_target_size(self):
+        """Fit the current source size into the video label, keeping aspect ratio"""
+        self._preview_target_size = self._preview_source_size.scaled(
+            self.video_label.size(), Qt.KeepAspectRatio)
+    
+    def eventFilter(self, obj, event):
+        if obj is self.video_label and event.type() == QEvent.Resize:
+            self._update_preview_target_size()
+            if self.video_thread:
+                self.video_thread.set_display_size(event.size())
+        return super().eventFilter(obj, event)
+    
     def update_counters(self, counts):
         """Update counter displays"""
-        total = counts.get('mobil', 0)
-        up = counts.get('bandung', 0)
-        down = counts.get('jakarta', 0)
-        
-        self.total_label.setText(f"Total: {total}")
-        self.up_label.setText(f"Up: {up}")
-        self.down_label.setText(f"Down: {down}")
-        
-        # Update FPS
-        self.frame_count += 1
-        
-        if self.start_time is None:
-            self.start_time = time.time()
+        if counts == self._last_counts:
+            return  # Nothing changed, skip formatting and relayout
+        self._last_counts = counts
         
-        elapsed_time = time.time() - self.start_time
-        fps = self.frame_count / elapsed_time if elapsed_time > 0 else 0
+        self.total_label.setText(f"Total: {counts.total}")
+        self.up_label.setText(f"Up: {counts.up}")
+        self.down_label.setText(f"Down: {counts.down}")
+    
+    def _flush_counters(self):
+        """Show the worker's latest counts and FPS (QTimer, ~10 Hz)"""
+        if not self.video_thread:
+            return
         
-        self.fps_label.setText(f"FPS: {fps:.1f}")
+        counts = self.video_thread.latest_counts
+        if counts is not None:
+            self.update_counters(counts)
+        self.fps_label.setText(f"FPS: {self.video_thread.fps:.1f}")
     
     def update_progress(self, progress):
         """Update progress bar"""
@@ -753,6 +1476,10 @@ class CarCounterApp(QWidget):
     
     def on_processing_finished(self):
         """Handle processing finished"""
+        # Show the final frame and counts before the worker goes away
+        self._refresh_preview()
+        self._flush_counters()
+        self._preview_timer.stop()
         self.start_btn.setEnabled(True)
         self.pause_btn.setEnabled(False)
         self.pause_btn.setText("Pause")
@@ -760,22 +1487,59 @@ class CarCounterApp(QWidget):
         self.progress_bar.setVisible(False)
         self.progress_bar.setValue(0)
         self.status_label.setText("Finished")
-        self.status_indicator.setStyleSheet("QLabel { color: #4CAF50; font-size: 16px; border: none; }")
+        self._set_status_state("ok")
         
-        self.log("Processing finished")
+        self._logger.info("Processing finished")
+        if self.video_thread and self.video_thread.car_counter is not None:
+            # Keep the loaded detector for the next run
+            self._car_counter = self.video_thread.car_counter
+            self._loaded_model_key = self._model_key
+        if self.video_thread:
+            if self.video_thread.isFinished():
+                # QThread.finished was already delivered (e.g. during a dialog)
+                self.video_thread.deleteLater()
+            else:
+                # run() may still be unwinding; hold the last reference until
+                # QThread.finished so the object isn't destroyed while running
+                self._exiting_threads.add(self.video_thread)
         self.video_thread = None
     
+    def _on_thread_exited(self):
+        """QThread.finished: the worker has fully returned, drop our reference"""
+        thread = self.sender()
+        # Only workers handed off by on_processing_finished; after an error the
+        # GUI still holds the thread as video_thread
+        if thread in self._exiting_threads:
+            self._exiting_threads.discard(thread)
+            thread.deleteLater()
+    
     def show_error(self, error_msg):
         """Show error message"""
-        QMessageBox.critical(self, "Error", error_msg)
-        self.log(f"ERROR: {error_msg}")
+        self._logger.error("ERROR: %s", error_msg)
+        # Hand the worker off first: the dialog's event loop may deliver
+        # QThread.finished before it closes
         self.on_processing_finished()
+        QMessageBox.critical(self, "Error", error_msg)
+    
+    def changeEvent(self, event):
+        """Stop preview work while the window is minimized"""
+        if event.type() == QEvent.WindowStateChange:
+            self._set_ui_visible(not self.isMinimized())
+        super().changeEvent(event)
     
-    def log(self, message):
-        """Add message to log"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_area.append(f"[{timestamp}] {message}")
+    def showEvent(self, event):
+        self._set_ui_visible(not self.isMinimized())
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        self._set_ui_visible(False)
+        super().hideEvent(event)
+    
+    def _set_ui_visible(self, visible):
+        """Remember window visibility and tell the worker whether to emit frames"""
+        self._ui_visible = visible
+        if self.video_thread:
+            self.video_thread.set_emit_frames(visible)
     
     def closeEvent(self, event):
         """Handle application close"""
@@ -792,6 +1556,10 @@ def main():
     # Set application style
     app.setStyle('Fusion')
     
+    # OpenCV's parallel resize/cvtColor share the CPU with torch's intra-op
+    # threads and the decoder; leave two cores so they don't oversubscribe
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) - 2))
+    
     window = CarCounterApp()
     window.show()
     
@@ -14,30 +14,177 @@ from PyQt5.QtGui import QImage, QPixmap, QFont, QDragEnterEvent, QDropEvent
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 import numpy as np
 import time
+import glob
+import logging
+from pathlib import Path
 from ultralytics import YOLO
 
+# Log debug/peringatan detector; ikut tampil di log aplikasi (logger "vehicle_counter")
+logger = logging.getLogger("vehicle_counter.detector")
+
+# Offset piksel titik pusat (sama dengan cv2.circle radius 2, filled)
+_DOT_DY, _DOT_DX = np.nonzero(np.add.outer(np.abs(np.arange(-2, 3)), np.abs(np.arange(-2, 3))) <= 2)
+_DOT_DY -= 2
+_DOT_DX -= 2
+
+
+def export_int8_model(model_path, data='data.yaml'):
+    """
+    Export model ke TFLite INT8 sekali, lalu gunakan ulang file hasil export
+    
+    Kalibrasi post-training memakai gambar train dari dataset di data.yaml.
+    Ultralytics versi ini hanya mendukung INT8 untuk export TFLite/CoreML.
+    
+    Args:
+        model_path (str): Path ke model .pt
+        data (str): Dataset YAML untuk kalibrasi
+        
+    Returns:
+        str: Path model .tflite INT8
+    """
+    weights = Path(model_path)
+    
+    def find_exported():
+        # Lokasi output berbeda antar versi exporter (di samping weights,
+        # di folder *_saved_model, atau di working directory)
+        patterns = [str(weights.parent / f"{weights.stem}*int8*.tflite"),
+                    str(weights.parent / f"{weights.stem}_saved_model" / "*int8*.tflite"),
+                    f"{weights.stem}*int8*.tflite",
+                    str(Path(f"{weights.stem}_saved_model") / "*int8*.tflite")]
+        for pattern in patterns:
+            matches = glob.glob(pattern)
+            if matches:
+                return matches[0]
+        return None
+    
+    exported = find_exported()
+    if exported is None:
+        YOLO(model_path).export(format='tflite', int8=True, data=data)
+        exported = find_exported()
+        if exported is None:
+            raise RuntimeError(f"INT8 export produced no .tflite for {model_path}")
+    return exported
+
+def export_engine_model(model_path, half=True, batch=1, device=0):
+    """
+    Export model ke engine TensorRT sekali, lalu gunakan ulang file hasil export
+    
+    Engine dibangun dengan batch dinamis 1..batch (imgsz tetap), sehingga
+    batch terakhir yang tidak penuh dan warm-up tetap bisa dijalankan. Nama file
+    menyimpan presisi dan batch maksimum agar tiap konfigurasi punya cache sendiri.
+    
+    Args:
+        model_path (str): Path ke model .pt
+        half (bool): Build engine FP16 (Tensor Core)
+        batch (int): Ukuran batch maksimum engine
+        device: GPU untuk build engine (TensorRT butuh CUDA)
+        
+    Returns:
+        str: Path file .engine
+    """
+    weights = Path(model_path)
+    engine = weights.with_name(f"{weights.stem}-{'fp16' if half else 'fp32'}-b{batch}.engine")
+    if not engine.exists():
+        YOLO(model_path).export(format='engine', half=half, dynamic=True, batch=batch,
+                                device=device)
+        # Exporter selalu menulis <stem>.engine di samping weights
+        weights.with_suffix('.engine').replace(engine)
+    return str(engine)
+
+def export_onnx_model(model_path):
+    """
+    Export model ke ONNX sekali, lalu gunakan ulang file hasil export
+    
+    Model diexport dengan batch/ukuran dinamis agar process_batch tetap bisa
+    dipakai. Ultralytics menjalankan file .onnx lewat ONNX Runtime (CUDA EP
+    jika onnxruntime-gpu terpasang, selain itu CPU).
+    
+    File cache diberi nama sendiri karena export engine TensorRT juga menulis
+    <stem>.onnx (FP16, batch tetap) sebagai file antara; file itu tidak
+    pernah dipakai ulang di sini.
+    
+    Args:
+        model_path (str): Path ke model .pt
+        
+    Returns:
+        str: Path file .onnx
+    """
+    weights = Path(model_path)
+    exported = weights.with_name(f"{weights.stem}-fp32-dynamic.onnx")
+    if not exported.exists():
+        YOLO(model_path).export(format='onnx', dynamic=True, simplify=True)
+        # Exporter selalu menulis <stem>.onnx di samping weights
+        weights.with_suffix('.onnx').replace(exported)
+    return str(exported)
+
+def export_openvino_model(model_path):
+    """
+    Export model ke OpenVINO sekali, lalu gunakan ulang folder hasil export
+    
+    Seperti ONNX, batch dibuat dinamis agar process_batch tetap bisa dipakai.
+    
+    Args:
+        model_path (str): Path ke model .pt
+        
+    Returns:
+        str: Path folder <stem>_openvino_model
+    """
+    weights = Path(model_path)
+    exported = weights.with_name(f"{weights.stem}_openvino_model")
+    if not exported.exists():
+        YOLO(model_path).export(format='openvino', dynamic=True)
+    return str(exported)
+
 class CarCounter:
     """
     Kelas untuk deteksi dan penghitungan mobil dalam video stream - FIXED
     """
     
-    def __init__(self, model_path):
+    def __init__(self, model_path, device=None, precision='fp32', backend='torch',
+                 batch_size=1):
         """
         Inisialisasi CarCounter
         
         Args:
             model_path (str): Path ke model YOLO yang sudah dilatih
+            device: Device inferensi ('cpu', 0, 'cuda:0', ...). None = CPU saat
+                debug off, default ultralytics saat debug on
+            precision (str): 'fp32', 'fp16' (half, hanya efektif di GPU) atau
+                'int8' (model TFLite hasil kuantisasi, diexport sekali)
+            backend (str): 'torch', 'tensorrt' (engine diexport sekali, hanya
+                di GPU; jatuh ke ONNX Runtime jika gagal), 'onnx' (ONNX Runtime)
+                atau 'openvino' (CPU Intel); jatuh ke .pt jika export gagal
+            batch_size (int): Ukuran batch inferensi (untuk engine statis)
         """
-        self.model = YOLO(model_path)
+        self.device = device
+        resolved_path = self._resolve_model_path(model_path, precision, backend, batch_size)
+        self.model = YOLO(resolved_path)
+        
+        # half hanya untuk model yang menerima input FP16: .pt, atau engine yang
+        # dibangun FP16. ONNX/OpenVINO/TFLite diexport FP32 dan menolak input half
+        if str(resolved_path).endswith('.engine'):
+            self.half = precision in ('fp16', 'int8')
+        else:
+            self.half = precision == 'fp16' and str(resolved_path).endswith('.pt')
+        
+        # Model TFLite (INT8) punya input batch statis 1: batch dijalankan per frame
+        self._static_batch = str(resolved_path).endswith('.tflite')
+        
+        # Argumen inferensi yang tetap, dibuat sekali (conf/iou/device per panggilan)
+        self._classes = [0, 5, 7]  # Classes: car, bus, truck dalam COCO dataset
+        self._predict_kwargs = dict(classes=self._classes, verbose=False, half=self.half)
+        self._track_kwargs = dict(self._predict_kwargs, persist=True, tracker='bytetrack.yaml')
         
         # Counter dan tracking data
         self.counts = {'total': 0, 'up': 0, 'down': 0}
-        self.tracked_objects = {}  # {id: {'last_y': y, 'counted': False, 'direction': None}}
+        # State track disimpan sebagai array paralel (SoA), satu slot per track
+        self._clear_tracks()
         
         # Line counting setup
         self.counting_line_y = None
         self.line_thickness = 3
         self.detection_zone = 50  # Zona deteksi di sekitar garis
+        self.sample_every = 1  # Stride frame dari pemanggil (1 = tiap frame)
         
         # Performance tracking untuk aplikasi GUI
         self.frame_count = 0
@@ -46,6 +193,18 @@ class CarCounter:
         self.fps_counter = 0
         self.current_fps = 0
         
+        # Template garis penghitungan dan teks info (lihat _render_template)
+        self._line_template = None
+        self._line_template_key = None
+        self._info_template = None
+        self._info_template_key = None
+        
+        # Panel hitam untuk background info counter (71x291 = area rectangle)
+        self._panel = np.zeros((71, 291, 3), dtype=np.uint8)
+        
+        # Tracker terpisah untuk process_batch
+        self._batch_tracker = None
+        
         # Debug info
         self.debug = True
         
@@ -58,8 +217,7 @@ class CarCounter:
             line_ratio: Rasio posisi garis (0.0-1.0) - 0.7 = 70% dari atas (mendekat ke bawah)
         """
         self.counting_line_y = int(frame_height * line_ratio)
-        if self.debug:
-            print(f"Counting line set at y={self.counting_line_y} (70% from top)")
+        logger.debug("Counting line set at y=%d (%d%% from top)", self.counting_line_y, line_ratio * 100)
     
     def set_counting_line_position(self, y_position):
         """
@@ -69,8 +227,7 @@ class CarCounter:
             y_position: Posisi Y dalam pixel
         """
         self.counting_line_y = y_position
-        if self.debug:
-            print(f"Counting line position set to y={self.counting_line_y}")
+        logger.debug("Counting line position set to y=%s", self.counting_line_y)
     
     def set_detection_zone(self, zone_size):
         """
@@ -80,8 +237,83 @@ class CarCounter:
             zone_size: Ukuran zona dalam pixel
         """
         self.detection_zone = zone_size
-        if self.debug:
-            print(f"Detection zone set to {self.detection_zone} pixels")
+        logger.debug("Detection zone set to %s pixels", self.detection_zone)
+    
+    def set_sample_every(self, sample_every):
+        """
+        Set stride frame yang dipakai pemanggil (frame lain hanya di-grab)
+        
+        Dengan stride N, objek bergerak ~N kali lebih jauh antar frame yang
+        diproses, jadi zona deteksi diperlebar sebanding agar crossing tidak
+        terlewat.
+        
+        Args:
+            sample_every: Proses 1 dari tiap N frame
+        """
+        self.sample_every = max(1, int(sample_every))
+        logger.debug("Sampling every %d frame(s)", self.sample_every)
+    
+    def _resolve_model_path(self, model_path, precision, backend, batch_size):
+        """Pilih file model sesuai backend/presisi, export sekali jika perlu"""
+        if backend == 'tensorrt' and str(model_path).endswith('.pt'):
+            if self.device in (None, 'cpu'):
+                logger.warning("TensorRT butuh GPU, memakai ONNX Runtime")
+            else:
+                if precision == 'int8':
+                    # Exporter ultralytics 8.0.x belum mendukung kalibrasi INT8
+                    # untuk engine; FP16 adalah presisi TensorRT tercepat di sini
+                    logger.warning("TensorRT INT8 belum didukung, membangun engine FP16")
+                try:
+                    # tracker (persist=True) tetap jalan: ByteTrack hanya memakai
+                    # hasil deteksi, tidak peduli backend model
+                    return export_engine_model(model_path, half=precision in ('fp16', 'int8'),
+                                               batch=batch_size, device=self.device)
+                except Exception as e:
+                    logger.warning("TensorRT export gagal, memakai ONNX Runtime: %s", e)
+            # ONNX Runtime berjalan tanpa library TensorRT (CUDA EP atau CPU)
+            backend = 'onnx'
+        if backend == 'openvino' and str(model_path).endswith('.pt'):
+            try:
+                return export_openvino_model(model_path)
+            except Exception as e:
+                logger.warning("OpenVINO export gagal, memakai model PyTorch: %s", e)
+        if backend == 'onnx' and str(model_path).endswith('.pt'):
+            try:
+                return export_onnx_model(model_path)
+            except Exception as e:
+                logger.warning("ONNX export gagal, memakai model PyTorch: %s", e)
+        if precision == 'int8':
+            try:
+                return export_int8_model(model_path)
+            except Exception as e:
+                logger.warning("INT8 export gagal, memakai model FP32: %s", e)
+        return model_path
+    
+    def warmup(self, frame_shape, runs=2, batch_size=1, confidence=0.25, iou=0.45):
+        """
+        Jalankan inferensi dummy agar frame pertama tidak mengalami cold-start
+        
+        Forward pass pertama menanggung inisialisasi backend (alokasi memori,
+        autotune cuDNN, fuse layer). Frame kosong tidak menghasilkan deteksi dan
+        tidak melewati tracker, jadi counter dan tracking tidak berubah.
+        
+        Args:
+            frame_shape: Shape frame video (h, w, c) agar ukuran input sama
+            runs (int): Jumlah inferensi dummy
+            batch_size (int): Jumlah frame per forward pass
+            confidence (float): Confidence threshold untuk deteksi
+            iou (float): IoU threshold untuk NMS
+        """
+        dummy = np.zeros(frame_shape, dtype=np.uint8)
+        source = dummy if batch_size == 1 or self._static_batch else [dummy] * batch_size
+        for _ in range(runs):
+            self.model(source, conf=confidence, iou=iou,
+                       device=self._inference_device(), **self._predict_kwargs)
+        
+        # Jendela FPS dimulai setelah warm-up, bukan sejak model dimuat
+        self.fps_counter = 0
+        self.current_fps = 0
+        self.last_fps_time = time.time()
     
     def process_frame(self, frame, tracking=True, confidence=0.25, iou=0.45):
         """
@@ -96,47 +328,20 @@ class CarCounter:
         Returns:
             tuple: (frame_processed, counts)
         """
-        # Initialize timing untuk performa tracking
-        if self.start_time is None:
-            self.start_time = time.time()
-        
-        # Update frame count dan FPS
-        self.frame_count += 1
-        self.fps_counter += 1
-        
-        # Calculate FPS setiap 30 frame
-        current_time = time.time()
-        if self.fps_counter >= 30:
-            elapsed = current_time - self.last_fps_time
-            self.current_fps = self.fps_counter / elapsed if elapsed > 0 else 0
-            self.fps_counter = 0
-            self.last_fps_time = current_time
-        
-        # Set garis penghitungan jika belum diset
-        if self.counting_line_y is None:
-            self.set_counting_line(frame.shape[0])
+        self._begin_frame(frame)
         
         # Deteksi mobil dengan YOLO - menggunakan parameter yang bisa disesuaikan
         if tracking:
             results = self.model.track(
-                frame, 
-                persist=True, 
-                classes=[0, 5, 7],  # Classes: car, bus, truck dalam COCO dataset
-                tracker="bytetrack.yaml",
+                frame,
                 conf=confidence,   # Confidence threshold dari parameter
                 iou=iou,          # IoU threshold dari parameter
-                verbose=False,    # Disable verbose untuk performa
-                device='cpu' if not self.debug else None  # Force CPU untuk stabilitas GUI
+                device=self._inference_device(),
+                **self._track_kwargs
             )
         else:
-            results = self.model(
-                frame,
-                classes=[0, 5, 7],  # Classes: car, bus, truck
-                conf=confidence,
-                iou=iou,
-                verbose=False,
-                device='cpu' if not self.debug else None
-            )
+            results = self.model(frame, conf=confidence, iou=iou,
+                                 device=self._inference_device(), **self._predict_kwargs)
         
         # Gambar garis penghitungan
         self.draw_counting_line(frame)
@@ -146,10 +351,111 @@ class CarCounter:
             boxes = results[0].boxes
             
             if tracking and boxes.id is not None:
-                self._process_with_tracking(frame, boxes)
+                # Satu transfer GPU->CPU untuk seluruh tensor hasil, lalu slice
+                # kolomnya: x1, y1, x2, y2, id, conf, cls
+                data = boxes.data.cpu().numpy()
+                self._process_with_tracking(
+                    frame,
+                    data[:, :4].astype(np.int32),
+                    data[:, -3].astype(int),
+                    data[:, -2]
+                )
             else:
                 self._process_without_tracking(frame, boxes)
         
+        return frame, self._finish_frame(frame)
+    
+    def process_batch(self, frames, tracking=True, confidence=0.25, iou=0.45):
+        """
+        Proses beberapa frame berurutan dengan satu forward pass YOLO
+        
+        model.track() pada list frame membuat satu tracker per slot batch,
+        sehingga ID tidak konsisten antar frame. Di sini deteksi dijalankan
+        sekali untuk seluruh batch, lalu tracker di-update per frame sesuai urutan.
+        Model dengan batch statis (TFLite) dijalankan satu frame per forward pass.
+        
+        Args:
+            frames (list): List frame video dari OpenCV (urutan waktu)
+            tracking (bool): Apakah menggunakan tracking atau tidak
+            confidence (float): Confidence threshold untuk deteksi
+            iou (float): IoU threshold untuk NMS
+            
+        Returns:
+            list: [(frame_processed, counts), ...] sesuai urutan input
+        """
+        if self._static_batch:
+            results = [self.model(frame, conf=confidence, iou=iou,
+                                  device=self._inference_device(), **self._predict_kwargs)[0]
+                       for frame in frames]
+        else:
+            results = self.model(frames, conf=confidence, iou=iou,
+                                 device=self._inference_device(), **self._predict_kwargs)
+        
+        outputs = []
+        for frame, result in zip(frames, results):
+            self._begin_frame(frame)
+            self.draw_counting_line(frame)
+            
+            boxes = result.boxes
+            if boxes is not None and len(boxes) > 0:
+                if tracking:
+                    tracks = self._get_batch_tracker().update(boxes.cpu().numpy(), frame)
+                    if len(tracks) > 0:
+                        # Kolom tracks: x1, y1, x2, y2, track_id, score, cls, idx
+                        self._process_with_tracking(
+                            frame,
+                            tracks[:, :4].astype(np.int32),
+                            tracks[:, 4].astype(int),
+                            tracks[:, 5]
+                        )
+                else:
+                    self._process_without_tracking(frame, boxes)
+            
+            outputs.append((frame, self._finish_frame(frame)))
+        
+        return outputs
+    
+    def _inference_device(self):
+        """Device yang diteruskan ke YOLO (eksplisit, atau CPU saat debug off)"""
+        if self.device is not None:
+            return self.device
+        return 'cpu' if not self.debug else None  # Force CPU untuk stabilitas GUI
+    
+    def _get_batch_tracker(self):
+        """Tracker ByteTrack untuk mode batch (dibuat saat pertama dipakai)"""
+        if self._batch_tracker is None:
+            from ultralytics.tracker import BYTETracker
+            from ultralytics.yolo.utils import IterableSimpleNamespace, yaml_load
+            from ultralytics.yolo.utils.checks import check_yaml
+            
+            cfg = IterableSimpleNamespace(**yaml_load(check_yaml('bytetrack.yaml')))
+            self._batch_tracker = BYTETracker(args=cfg, frame_rate=30)
+        return self._batch_tracker
+    
+    def _begin_frame(self, frame):
+        """Update timing/FPS dan pastikan garis penghitungan sudah diset"""
+        # Initialize timing untuk performa tracking
+        if self.start_time is None:
+            self.start_time = time.time()
+        
+        # Update frame count dan FPS
+        self.frame_count += 1
+        self.fps_counter += 1
+        
+        # Calculate FPS setiap 30 frame
+        current_time = time.time()
+        if self.fps_counter >= 30:
+            elapsed = current_time - self.last_fps_time
+            self.current_fps = self.fps_counter / elapsed if elapsed > 0 else 0
+            self.fps_counter = 0
+            self.last_fps_time = current_time
+        
+        # Set garis penghitungan jika belum diset
+        if self.counting_line_y is None:
+            self.set_counting_line(frame.shape[0])
+    
+    def _finish_frame(self, frame):
+        """Cleanup tracking, gambar info counter, dan kembalikan counts"""
         # Cleanup tracked objects yang hilang
         self._cleanup_tracked_objects()
         
@@ -157,124 +463,170 @@ class CarCounter:
         self.draw_counter_info(frame)
         
         # Update counts untuk kompatibilitas dengan UI lama
-        legacy_counts = {
+        return {
             'mobil': self.counts['total'],
             'jakarta': self.counts['down'],  # Arah turun = Jakarta
             'bandung': self.counts['up']     # Arah naik = Bandung
         }
-        
-        return frame, legacy_counts
     
-    def _process_with_tracking(self, frame, boxes):
-        """Proses deteksi dengan tracking ID"""
-        box_coords = boxes.xyxy.cpu().numpy().astype(int)
-        track_ids = boxes.id.cpu().numpy().astype(int) if boxes.id is not None else []
-        confidences = boxes.conf.cpu().numpy()
-        
-        current_ids = set()
-        
-        for i, (box, conf) in enumerate(zip(box_coords, confidences)):
-            x1, y1, x2, y2 = box
-            
-            # Jika ada tracking ID, gunakan, jika tidak buat ID sementara
-            track_id = track_ids[i] if i < len(track_ids) else -1
-            
-            # Hitung pusat bounding box
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            
-            # Gambar bounding box dan info
-            label = f'ID:{track_id} {conf:.2f}' if track_id != -1 else f'Car {conf:.2f}'
-            self.draw_detection(frame, box, label, center_x, center_y)
-            
-            # Jika tidak ada tracking ID, skip processing lebih lanjut
-            if track_id == -1:
-                continue
-                
-            current_ids.add(track_id)
-            
-            # Update tracking data
-            if track_id not in self.tracked_objects:
-                self.tracked_objects[track_id] = {
-                    'last_y': center_y,
-                    'counted': False,
-                    'direction': None,
-                    'last_seen': time.time()
-                }
-            else:
-                # Cek apakah objek melewati garis penghitungan
-                self._check_line_crossing(track_id, center_y)
-                self.tracked_objects[track_id]['last_y'] = center_y
-                self.tracked_objects[track_id]['last_seen'] = time.time()
+    def _clear_tracks(self):
+        """Kosongkan state tracking (array paralel per slot + map id -> slot)"""
+        self._ids = np.empty(0, dtype=np.int64)
+        self._last_y = np.empty(0, dtype=np.int32)
+        self._counted = np.empty(0, dtype=bool)
+        self._last_seen = np.empty(0, dtype=np.float64)
+        self._id_to_slot = {}
+    
+    def _process_with_tracking(self, frame, box_coords, track_ids, confidences):
+        """Proses deteksi dengan tracking ID (array xyxy, id, conf)"""
+        now = time.time()
+        
+        # Hitung pusat semua bounding box sekaligus
+        centers = (box_coords[:, :2] + box_coords[:, 2:]) // 2
+        center_ys = centers[:, 1]
+        
+        # Cari slot tiap track; -1 = track baru (atau tanpa ID)
+        ids = track_ids.tolist()
+        id_to_slot = self._id_to_slot
+        slots = np.fromiter((id_to_slot.get(track_id, -1) for track_id in ids),
+                            dtype=np.intp, count=len(ids))
+        known = slots >= 0
+        known_slots = slots[known]
+        
+        # Gather state sebelumnya; track baru dianggap sudah dihitung agar
+        # tidak ikut dicek pada frame pertamanya
+        last_y = np.zeros(len(ids), dtype=np.int32)
+        counted = np.ones(len(ids), dtype=bool)
+        last_y[known] = self._last_y[known_slots]
+        counted[known] = self._counted[known_slots]
+        
+        # Cek crossing untuk semua objek sekaligus
+        crossed_down, crossed_up = self._line_crossings(last_y, center_ys, counted)
+        n_down = int(crossed_down.sum())
+        n_up = int(crossed_up.sum())
+        if n_down or n_up:
+            self.counts['down'] += n_down
+            self.counts['up'] += n_up
+            self.counts['total'] += n_down + n_up
+            self._counted[slots[crossed_down | crossed_up]] = True
+            if logger.isEnabledFor(logging.DEBUG):
+                for i in np.flatnonzero(crossed_down | crossed_up):
+                    logger.debug("Vehicle ID:%d counted going %s. Total: %d", ids[i],
+                                 'down' if crossed_down[i] else 'up', self.counts['total'])
+        
+        # Scatter posisi terbaru ke slot yang sudah ada
+        self._last_y[known_slots] = center_ys[known]
+        self._last_seen[known_slots] = now
+        
+        # Track baru ditambahkan di akhir array
+        new = ~known & (track_ids != -1)
+        if new.any():
+            new_ids = track_ids[new]
+            base = len(self._ids)
+            id_to_slot.update(zip(new_ids.tolist(), range(base, base + len(new_ids))))
+            self._ids = np.concatenate((self._ids, new_ids))
+            self._last_y = np.concatenate((self._last_y, center_ys[new].astype(np.int32, copy=False)))
+            self._counted = np.concatenate((self._counted, np.zeros(len(new_ids), dtype=bool)))
+            self._last_seen = np.concatenate((self._last_seen, np.full(len(new_ids), now)))
+        
+        self.draw_detections(frame, box_coords, centers, ids)
     
     def _process_without_tracking(self, frame, boxes):
         """Proses deteksi tanpa tracking (fallback sederhana)"""
-        box_coords = boxes.xyxy.cpu().numpy().astype(int)
-        confidences = boxes.conf.cpu().numpy()
+        # Satu transfer GPU->CPU, lalu slice kolom (xyxy, conf = kolom kedua terakhir)
+        data = boxes.data.cpu().numpy()
+        box_coords = data[:, :4].astype(np.int32)
         
-        for box, conf in zip(box_coords, confidences):
-            x1, y1, x2, y2 = box
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            
-            # Gambar bounding box
-            self.draw_detection(frame, box, f'Car {conf:.2f}', center_x, center_y)
+        # Gambar bounding box
+        self.draw_detections(frame, box_coords, (box_coords[:, :2] + box_coords[:, 2:]) // 2)
     
-    def _check_line_crossing(self, track_id, current_y):
-        """Cek apakah objek melewati garis penghitungan"""
-        obj_data = self.tracked_objects[track_id]
-        last_y = obj_data['last_y']
-        
-        # Jarak dari garis penghitungan
-        line_distance = abs(current_y - self.counting_line_y)
+    def _line_crossings(self, last_y, current_y, counted):
+        """
+        Cek crossing garis penghitungan untuk banyak objek sekaligus
         
-        # Cek apakah objek melewati garis dan belum dihitung
-        if not obj_data['counted'] and line_distance < self.detection_zone:
-            
-            # Tentukan arah gerakan
-            if last_y < self.counting_line_y and current_y >= self.counting_line_y:
-                # Bergerak ke bawah (turun)
-                direction = 'down'
-            elif last_y > self.counting_line_y and current_y <= self.counting_line_y:
-                # Bergerak ke atas (naik)
-                direction = 'up'
-            else:
-                direction = None
+        Args:
+            last_y: Array posisi Y sebelumnya
+            current_y: Array posisi Y sekarang
+            counted: Array bool, objek yang sudah dihitung
             
-            if direction:
-                # Hitung kendaraan
-                self.counts[direction] += 1
-                self.counts['total'] += 1
-                obj_data['counted'] = True
-                obj_data['direction'] = direction
-                
-                if self.debug:
-                    print(f"Vehicle ID:{track_id} counted going {direction}. Total: {self.counts['total']}")
+        Returns:
+            tuple: (mask_turun, mask_naik)
+        """
+        line_y = self.counting_line_y
+        
+        # Hanya objek yang belum dihitung dan berada di zona deteksi
+        # (zona diperlebar sesuai stride frame)
+        candidates = ~counted & (np.abs(current_y - line_y) < self.detection_zone * self.sample_every)
+        
+        # Bergerak ke bawah (turun) / ke atas (naik)
+        crossed_down = candidates & (last_y < line_y) & (current_y >= line_y)
+        crossed_up = candidates & (last_y > line_y) & (current_y <= line_y)
+        return crossed_down, crossed_up
     
     def _cleanup_tracked_objects(self):
         """Bersihkan objek yang sudah tidak terdeteksi"""
-        current_time = time.time()
-        to_remove = []
-        
-        for track_id, data in self.tracked_objects.items():
-            if current_time - data['last_seen'] > 2.0:  # 2 detik timeout
-                to_remove.append(track_id)
-        
-        for track_id in to_remove:
-            del self.tracked_objects[track_id]
+        keep = (time.time() - self._last_seen) <= 2.0  # 2 detik timeout
+        if keep.all():
+            return
+        
+        # Kompaksi array lalu bangun ulang map id -> slot
+        self._ids = self._ids[keep]
+        self._last_y = self._last_y[keep]
+        self._counted = self._counted[keep]
+        self._last_seen = self._last_seen[keep]
+        self._id_to_slot = {track_id: slot for slot, track_id in enumerate(self._ids.tolist())}
     
     def draw_counting_line(self, frame):
         """Gambar garis penghitungan - minimalist"""
-        height, width = frame.shape[:2]
-        
+        # Garis dan label dirender sekali ke template; tiap frame hanya
+        # menyalin piksel template (dibuat ulang jika ukuran/posisi berubah)
+        key = (frame.shape, self.counting_line_y)
+        if self._line_template_key != key:
+            self._line_template = self._render_template(frame.shape, self._draw_line_template)
+            self._line_template_key = key
+        self._apply_template(frame, self._line_template)
+    
+    def _draw_line_template(self, image):
+        """Garis penghitungan dan labelnya (digambar ke template)"""
         # Garis penghitungan utama - lebih tipis
-        cv2.line(frame, (0, self.counting_line_y), (width, self.counting_line_y), 
+        cv2.line(image, (0, self.counting_line_y), (image.shape[1], self.counting_line_y), 
                 (0, 255, 0), 1)
         
         # Label garis - lebih kecil dan minimal
-        cv2.putText(frame, 'COUNT', (10, self.counting_line_y - 5), 
+        cv2.putText(image, 'COUNT', (10, self.counting_line_y - 5), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
     
+    @staticmethod
+    def _render_template(shape, draw):
+        """
+        Render gambar statis sekali menjadi template piksel
+        
+        draw() dipanggil di atas latar hitam dan putih: latar hitam memberi
+        warna x coverage, selisih keduanya memberi bobot piksel frame yang
+        tersisa, jadi tepi teks yang di-antialias tetap di-blend dengan benar.
+        
+        Args:
+            shape: Shape area yang digambar (h, w, 3)
+            draw: Fungsi draw(image) berisi panggilan cv2
+            
+        Returns:
+            tuple: (ys, xs, warna, bobot) untuk _apply_template
+        """
+        black = np.zeros(shape, dtype=np.uint8)
+        white = np.full(shape, 255, dtype=np.uint8)
+        draw(black)
+        draw(white)
+        ys, xs = np.nonzero((black != 0).any(axis=2) | (white != 255).any(axis=2))
+        colors = black[ys, xs]
+        keep = white[ys, xs].astype(np.uint16) - colors
+        return ys, xs, colors, keep
+    
+    @staticmethod
+    def _apply_template(image, template):
+        """Blend template dari _render_template ke image (in place)"""
+        ys, xs, colors, keep = template
+        image[ys, xs] = (image[ys, xs] * keep + 127) // 255 + colors
+    
     def draw_detection(self, frame, box, label, center_x, center_y):
         """Gambar bounding box dan info deteksi - minimalist"""
         x1, y1, x2, y2 = box
@@ -292,27 +644,82 @@ class CarCounter:
         # Titik pusat - lebih kecil
         cv2.circle(frame, (center_x, center_y), 2, (0, 0, 255), -1)
     
+    def draw_detections(self, frame, box_coords, centers, track_ids=None):
+        """
+        Gambar semua deteksi sekaligus - minimalist
+        
+        Semua bounding box digambar dengan satu cv2.polylines dan semua titik
+        pusat dengan satu assignment numpy; hanya label ID yang per objek.
+        
+        Args:
+            frame: Frame video dari OpenCV
+            box_coords: Array (N, 4) xyxy
+            centers: Array (N, 2) titik pusat
+            track_ids: List ID tracking (-1 = tanpa ID), None = tanpa label
+        """
+        if len(box_coords) == 0:
+            return
+        
+        # Bounding box - lebih tipis dan minimal
+        x1, y1, x2, y2 = box_coords.T
+        corners = np.stack((x1, y1, x2, y1, x2, y2, x1, y2), axis=1)
+        cv2.polylines(frame, list(corners.reshape(-1, 4, 2).astype(np.int32, copy=False)), True, (0, 255, 0), 1)
+        
+        # Label - hanya ID jika ada, lebih kecil
+        if track_ids is not None:
+            for track_id, left, top in zip(track_ids, x1.tolist(), y1.tolist()):
+                if track_id != -1:
+                    cv2.putText(frame, f'ID:{track_id}', (left, top - 5), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+        
+        # Titik pusat - lebih kecil
+        height, width = frame.shape[:2]
+        dot_y = (centers[:, 1:2] + _DOT_DY).clip(0, height - 1)
+        dot_x = (centers[:, 0:1] + _DOT_DX).clip(0, width - 1)
+        frame[dot_y, dot_x] = (0, 0, 255)
+    
     def draw_counter_info(self, frame):
         """Gambar informasi counter di frame - minimalist"""
-        # Background untuk text - lebih kecil dan minimal
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (10, 10), (300, 80), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
-        
+        # Background untuk text - lebih kecil dan minimal. Blend hanya area
+        # panel (bukan seluruh frame) dengan panel hitam yang dialokasi sekali
+        roi = frame[10:81, 10:301]
+        panel = self._panel[:roi.shape[0], :roi.shape[1]]
+        cv2.addWeighted(panel, 0.7, roi, 0.3, 0, dst=roi)
+        
+        # Teks hanya dirender ulang saat angkanya berubah (FPS tiap 30 frame);
+        # frame lain cukup blend template teks ke area panel
+        hud = frame[:90, :640]
+        key = (hud.shape, self.counts['total'], self.counts['up'], self.counts['down'],
+               round(self.current_fps, 1))
+        if self._info_template_key != key:
+            self._info_template = self._render_template(hud.shape, self._draw_info_text)
+            self._info_template_key = key
+        self._apply_template(hud, self._info_template)
+    
+    def _draw_info_text(self, image):
+        """Teks info counter (digambar ke template)"""
         # Counter info utama - hanya yang penting
-        cv2.putText(frame, f"Total: {self.counts['total']}", 
+        cv2.putText(image, f"Total: {self.counts['total']}", 
                    (20, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        cv2.putText(frame, f"Up: {self.counts['up']} | Down: {self.counts['down']}", 
+        cv2.putText(image, f"Up: {self.counts['up']} | Down: {self.counts['down']}", 
                    (20, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
         
         # FPS info - minimal
-        cv2.putText(frame, f"FPS: {self.current_fps:.1f}", 
+        cv2.putText(image, f"FPS: {self.current_fps:.1f}", 
                    (20, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (150, 150, 150), 1)
     
     def reset_counter(self):
         """Reset counter dan tracking data"""
-        self.counts = {'total': 0, 'up': 0, 'down': 0}
-        self.tracked_objects.clear()
+        # Dict counts dipakai ulang, tidak dialokasi ulang
+        for key in self.counts:
+            self.counts[key] = 0
+        self._clear_tracks()
+        self._batch_tracker = None
+        # Tracker persist milik model.track() juga dibuang; track() berikutnya
+        # membuat tracker baru, jadi ID dan state Kalman video lama tidak terbawa
+        predictor = getattr(self.model, 'predictor', None)
+        if predictor is not None and hasattr(predictor, 'trackers'):
+            del predictor.trackers
         
         # Reset performance tracking
         self.frame_count = 0
@@ -321,8 +728,7 @@ class CarCounter:
         self.current_fps = 0
         self.last_fps_time = time.time()
         
-        if self.debug:
-            print("Counter reset!")
+        logger.debug("Counter reset!")
     
     def get_count(self):
         """Mendapatkan total jumlah kendaraan"""
@@ -341,5 +747,6 @@ class CarCounter:
         }
     
     def set_debug(self, debug=True):
-        """Enable/disable debug mode"""
-        self.debug = debug
\ No newline at end of file
+        """Enable/disable debug mode (pesan debug lewat logger modul)"""
+        self.debug = debug
+        logger.setLevel(logging.DEBUG if debug else logging.NOTSET)
\ No newline at end of file